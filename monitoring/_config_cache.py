@@ -0,0 +1,49 @@
+"""
+DressUp AI - Monitoring Config Cache
+Pickle cache for parsed monitoring configs, shared by the setup scripts
+"""
+
+import os
+import pickle
+from pathlib import Path
+
+# Cached pickles are loaded with pickle.load, so only this (trusted)
+# directory is ever used to store them
+CACHE_DIR = Path(__file__).resolve().parent
+
+def load_cached(config_path: Path, parse):
+    """Parse a config file, reusing a pickled copy while the file is unchanged.
+    
+    Configs outside the monitoring directory are always parsed directly.
+    """
+    config_path = Path(config_path).resolve()
+    if config_path.parent != CACHE_DIR:
+        return parse(config_path)
+    
+    cache_path = config_path.with_name(config_path.name + '.pkl')
+    stat = config_path.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_key, data = pickle.load(f)
+        if cached_key == key:
+            return data
+    except Exception:
+        pass  # Missing or unreadable cache, parse the source instead
+    
+    data = parse(config_path)
+    
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, 'wb') as f:
+            pickle.dump((key, data), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        # Caching is best effort, e.g. on a read-only checkout
+        try:
+            tmp_path.unlink(missing_ok=True)
+        except OSError:
+            pass
+    
+    return data
@@ -4,52 +4,68 @@ DressUp AI - Advanced Budget Alerts Creator
 Creates sophisticated budget monitoring with granular service filtering and alerts
 """
 
+import functools
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from google.cloud import billing_budgets_v1
 from google.cloud.billing_budgets_v1 import Budget
 from google.cloud import billing
 from google.type import money_pb2
 import argparse
 
+# Services monitored by default
+_DEFAULT_SERVICES = (
+    "services/aiplatform.googleapis.com",  # Vertex AI
+    "services/cloudfunctions.googleapis.com",  # Cloud Functions
+    "services/storage.googleapis.com",  # Cloud Storage
+    "services/logging.googleapis.com",  # Cloud Logging
+    "services/monitoring.googleapis.com"  # Cloud Monitoring
+)
+
+@functools.lru_cache(maxsize=1)
+def get_billing_client() -> billing.CloudBillingClient:
+    """Get a shared Cloud Billing client so its gRPC channel is reused."""
+    return billing.CloudBillingClient()
+
+@functools.lru_cache(maxsize=1)
+def get_budget_client() -> billing_budgets_v1.BudgetServiceClient:
+    """Get a shared Billing Budgets client so its gRPC channel is reused."""
+    return billing_budgets_v1.BudgetServiceClient()
+
+@functools.lru_cache(maxsize=None)
 def get_billing_account_id(project_id: str) -> str:
-    """Get the billing account ID for a project."""
-    try:
-        billing_client = billing.CloudBillingClient()
-        project_name = f"projects/{project_id}"
-        project_billing = billing_client.get_project_billing_info(name=project_name)
-        
-        if not project_billing.billing_enabled:
-            raise Exception(f"Billing is not enabled for project {project_id}")
-        
-        return project_billing.billing_account_name.split('/')[-1]
-    except Exception as e:
-        print(f"❌ Failed to get billing account: {e}")
-        raise
+    """Get the billing account ID for a project.
+    
+    Set DRESSUP_BILLING_ACCOUNT to skip the Cloud Billing lookup entirely.
+    """
+    billing_account = os.environ.get("DRESSUP_BILLING_ACCOUNT")
+    if billing_account:
+        return billing_account.split('/')[-1]
+    
+    billing_client = get_billing_client()
+    project_name = f"projects/{project_id}"
+    project_billing = billing_client.get_project_billing_info(name=project_name)
+    
+    if not project_billing.billing_enabled:
+        raise Exception(f"Billing is not enabled for project {project_id}")
+    
+    return project_billing.billing_account_name.split('/')[-1]
 
 def create_budget(
     client: billing_budgets_v1.BudgetServiceClient,
-    billing_account: str,
-    project_id: str,
+    parent: str,
+    project_name: str,
     budget_amount: int,
     display_name: str,
-    services: list = None,
+    services: tuple = _DEFAULT_SERVICES,
     notification_channels: list = None
 ) -> Budget:
-    """Create a budget with specified parameters."""
-    
-    # Default services if none specified
-    if services is None:
-        services = [
-            "services/aiplatform.googleapis.com",  # Vertex AI
-            "services/cloudfunctions.googleapis.com",  # Cloud Functions
-            "services/storage.googleapis.com",  # Cloud Storage
-            "services/logging.googleapis.com",  # Cloud Logging
-            "services/monitoring.googleapis.com"  # Cloud Monitoring
-        ]
+    """Create a budget under parent ("billingAccounts/<id>") scoped to project_name ("projects/<id>")."""
     
     # Create budget filter
     budget_filter = billing_budgets_v1.Filter(
-        projects=[f"projects/{project_id}"],
+        projects=[project_name],
         services=services
     )
     
@@ -62,27 +78,13 @@ def create_budget(
     )
     
     # Create threshold rules (50%, 75%, 90%, 100%, 110%)
+    spend_basis = billing_budgets_v1.ThresholdRule.Basis.CURRENT_SPEND
     threshold_rules = [
         billing_budgets_v1.ThresholdRule(
-            threshold_percent=0.5,
-            spend_basis=billing_budgets_v1.ThresholdRule.Basis.CURRENT_SPEND
-        ),
-        billing_budgets_v1.ThresholdRule(
-            threshold_percent=0.75,
-            spend_basis=billing_budgets_v1.ThresholdRule.Basis.CURRENT_SPEND
-        ),
-        billing_budgets_v1.ThresholdRule(
-            threshold_percent=0.9,
-            spend_basis=billing_budgets_v1.ThresholdRule.Basis.CURRENT_SPEND
-        ),
-        billing_budgets_v1.ThresholdRule(
-            threshold_percent=1.0,
-            spend_basis=billing_budgets_v1.ThresholdRule.Basis.CURRENT_SPEND
-        ),
-        billing_budgets_v1.ThresholdRule(
-            threshold_percent=1.1,
-            spend_basis=billing_budgets_v1.ThresholdRule.Basis.CURRENT_SPEND
+            threshold_percent=percent,
+            spend_basis=spend_basis
         )
+        for percent in (0.5, 0.75, 0.9, 1.0, 1.1)
     ]
     
     # Create all updates rule
@@ -101,13 +103,7 @@ def create_budget(
     )
     
     # Create the budget
-    parent = f"billingAccounts/{billing_account}"
-    try:
-        result = client.create_budget(parent=parent, budget=budget)
-        return result
-    except Exception as e:
-        print(f"❌ Failed to create budget '{display_name}': {e}")
-        raise
+    return client.create_budget(parent=parent, budget=budget)
 
 def create_notification_channel(email: str):
     """Create a notification channel for budget alerts."""
@@ -153,7 +149,7 @@ def main():
     
     # Initialize client
     try:
-        client = billing_budgets_v1.BudgetServiceClient()
+        client = get_budget_client()
         print("✅ Connected to Billing Budgets API")
     except Exception as e:
         print(f"❌ Failed to initialize client: {e}")
@@ -161,93 +157,94 @@ def main():
     
     print()
     
-    # Create budgets
-    budgets_created = 0
-    
-    # Daily budget
-    try:
-        print(f"🔧 Creating daily budget (${args.daily_budget})...")
-        daily_budget = create_budget(
-            client,
-            billing_account,
-            args.project_id,
+    # Create budgets concurrently; each one is an independent RPC
+    budgets = [
+        (
+            "daily",
             args.daily_budget,
-            f"DressUp AI - Daily Budget (${args.daily_budget})"
-        )
-        print(f"✅ Created daily budget: {daily_budget.name.split('/')[-1]}")
-        budgets_created += 1
-    except Exception as e:
-        print(f"❌ Failed to create daily budget: {e}")
-    
-    # Monthly budget
-    try:
-        print(f"🔧 Creating monthly budget (${args.monthly_budget})...")
-        monthly_budget = create_budget(
-            client,
-            billing_account,
-            args.project_id,
+            f"DressUp AI - Daily Budget (${args.daily_budget})",
+            _DEFAULT_SERVICES
+        ),
+        (
+            "monthly",
             args.monthly_budget,
-            f"DressUp AI - Monthly Budget (${args.monthly_budget})"
-        )
-        print(f"✅ Created monthly budget: {monthly_budget.name.split('/')[-1]}")
-        budgets_created += 1
-    except Exception as e:
-        print(f"❌ Failed to create monthly budget: {e}")
-    
-    # Vertex AI specific budget (high priority)
-    try:
-        print(f"🔧 Creating Vertex AI budget (${args.monthly_budget // 2})...")
-        vertex_budget = create_budget(
-            client,
-            billing_account,
-            args.project_id,
+            f"DressUp AI - Monthly Budget (${args.monthly_budget})",
+            _DEFAULT_SERVICES
+        ),
+        (
+            "Vertex AI",
             args.monthly_budget // 2,  # Half of monthly budget for Vertex AI
             f"DressUp AI - Vertex AI Budget (${args.monthly_budget // 2})",
-            services=["services/aiplatform.googleapis.com"]  # Vertex AI only
+            ("services/aiplatform.googleapis.com",)  # Vertex AI only
         )
-        print(f"✅ Created Vertex AI budget: {vertex_budget.name.split('/')[-1]}")
-        budgets_created += 1
-    except Exception as e:
-        print(f"❌ Failed to create Vertex AI budget: {e}")
+    ]
     
-    print()
-    print(f"📊 Budget Creation Summary:")
-    print(f"   ✅ Successfully created: {budgets_created} budgets")
-    print()
+    budgets_created = 0
+    parent = f"billingAccounts/{billing_account}"
+    project_name = f"projects/{args.project_id}"
+    
+    with ThreadPoolExecutor(max_workers=len(budgets)) as executor:
+        futures = {}
+        for label, amount, display_name, services in budgets:
+            print(f"🔧 Creating {label} budget (${amount})...")
+            future = executor.submit(
+                create_budget,
+                client,
+                parent,
+                project_name,
+                amount,
+                display_name,
+                services=services
+            )
+            futures[future] = label
+        
+        for future in as_completed(futures):
+            label = futures[future]
+            try:
+                budget = future.result()
+                print(f"✅ Created {label} budget: {budget.name.split('/')[-1]}")
+                budgets_created += 1
+            except Exception as e:
+                print(f"❌ Failed to create {label} budget: {e}")
+    
+    sys.stdout.write(
+        "\n"
+        "📊 Budget Creation Summary:\n"
+        f"   ✅ Successfully created: {budgets_created} budgets\n"
+        "\n"
+    )
     
     if budgets_created > 0:
-        print("💡 Budget Alert Configuration:")
-        print("   • Threshold alerts at: 50%, 75%, 90%, 100%, 110%")
-        print("   • Based on current spend (not forecasted)")
-        print("   • Notifications sent to project billing administrators")
-        print()
-        
-        print("🎯 Services Monitored:")
-        print("   • Vertex AI (primary cost driver)")
-        print("   • Cloud Functions (execution and storage)")
-        print("   • Cloud Storage (file storage)")
-        print("   • Cloud Logging (log ingestion and storage)")
-        print("   • Cloud Monitoring (metrics and dashboards)")
-        print()
-        
-        print("📈 Cost Optimization Recommendations:")
-        print("   • Monitor Vertex AI token usage and optimize prompts")
-        print("   • Implement response caching for repeated requests")
-        print("   • Set Cloud Function memory and timeout limits")
-        print("   • Use lifecycle policies for Cloud Storage cleanup")
-        print("   • Monitor log retention and sampling policies")
-        print()
-        
-        print("🔗 View and Manage Budgets:")
-        print(f"   https://console.cloud.google.com/billing/budgets?project={args.project_id}")
-        print()
-        
-        print("🚀 Next Steps:")
-        print("   1. Deploy monitoring infrastructure")
-        print("   2. Generate test traffic to validate costs")
-        print("   3. Monitor daily spend against budgets")
-        print("   4. Set up cost anomaly detection alerts")
-        print("   5. Create automated scaling policies")
+        sys.stdout.write(
+            "💡 Budget Alert Configuration:\n"
+            "   • Threshold alerts at: 50%, 75%, 90%, 100%, 110%\n"
+            "   • Based on current spend (not forecasted)\n"
+            "   • Notifications sent to project billing administrators\n"
+            "\n"
+            "🎯 Services Monitored:\n"
+            "   • Vertex AI (primary cost driver)\n"
+            "   • Cloud Functions (execution and storage)\n"
+            "   • Cloud Storage (file storage)\n"
+            "   • Cloud Logging (log ingestion and storage)\n"
+            "   • Cloud Monitoring (metrics and dashboards)\n"
+            "\n"
+            "📈 Cost Optimization Recommendations:\n"
+            "   • Monitor Vertex AI token usage and optimize prompts\n"
+            "   • Implement response caching for repeated requests\n"
+            "   • Set Cloud Function memory and timeout limits\n"
+            "   • Use lifecycle policies for Cloud Storage cleanup\n"
+            "   • Monitor log retention and sampling policies\n"
+            "\n"
+            "🔗 View and Manage Budgets:\n"
+            f"   https://console.cloud.google.com/billing/budgets?project={args.project_id}\n"
+            "\n"
+            "🚀 Next Steps:\n"
+            "   1. Deploy monitoring infrastructure\n"
+            "   2. Generate test traffic to validate costs\n"
+            "   3. Monitor daily spend against budgets\n"
+            "   4. Set up cost anomaly detection alerts\n"
+            "   5. Create automated scaling policies\n"
+        )
     
     if args.email:
         print()
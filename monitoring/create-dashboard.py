@@ -4,21 +4,58 @@ DressUp AI - Advanced Monitoring Dashboard Creator
 Creates sophisticated monitoring dashboards with custom widgets and layouts
 """
 
+import argparse
+import functools
 import json
+import re
 import sys
+from collections import Counter
+from pathlib import Path
 from google.cloud import monitoring_dashboard_v1
 from google.cloud.monitoring_dashboard_v1 import Dashboard
 import yaml
 
-def load_dashboard_config(config_path: str) -> dict:
-    """Load dashboard configuration from JSON file."""
+from _config_cache import load_cached
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+_USER_METRIC_PREFIX = 'logging.googleapis.com/user/'
+_METRIC_RE = re.compile(r'metric\.type\s*=\s*"?([^"\s]+)')
+
+@functools.lru_cache(maxsize=1)
+def get_dashboard_client() -> monitoring_dashboard_v1.DashboardsServiceClient:
+    """Get a shared Dashboards client so its gRPC channel is reused."""
+    return monitoring_dashboard_v1.DashboardsServiceClient()
+
+def _parse_json(config_path: Path) -> dict:
+    if orjson is not None:
+        with open(config_path, 'rb') as f:
+            return orjson.loads(f.read())
+    
     with open(config_path, 'r') as f:
         return json.load(f)
 
-def load_metrics_config(config_path: str) -> dict:
-    """Load metrics configuration to validate dashboard references."""
+def _parse_yaml(config_path: Path) -> dict:
     with open(config_path, 'r') as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_YamlLoader)
+
+def load_dashboard_config(config_path: Path) -> dict:
+    """Load dashboard configuration from JSON file."""
+    return load_cached(config_path, _parse_json)
+
+def load_metrics_config(config_path: Path) -> dict:
+    """Load metrics configuration to validate dashboard references."""
+    return load_cached(config_path, _parse_yaml)
 
 def create_dashboard(client: monitoring_dashboard_v1.DashboardsServiceClient, project_id: str, dashboard_config: dict) -> Dashboard:
     """Create a monitoring dashboard."""
@@ -34,71 +71,57 @@ def create_dashboard(client: monitoring_dashboard_v1.DashboardsServiceClient, pr
     # Create the dashboard
     project_name = f"projects/{project_id}"
     
-    try:
-        result = client.create_dashboard(parent=project_name, dashboard=dashboard)
-        return result
-    except Exception as e:
-        print(f"❌ Failed to create dashboard: {e}")
-        raise
+    return client.create_dashboard(parent=project_name, dashboard=dashboard)
+
+def _iter_filters(widget: dict):
+    """Yield the time series filter of every query in a widget."""
+    for data_set in widget.get('xyChart', {}).get('dataSets', []):
+        yield data_set.get('timeSeriesQuery', {}).get('timeSeriesFilter', {}).get('filter', '')
+    
+    yield widget.get('scorecard', {}).get('timeSeriesQuery', {}).get('timeSeriesFilter', {}).get('filter', '')
 
 def validate_metrics_references(dashboard_config: dict, metrics_config: dict) -> list:
     """Validate that dashboard references existing metrics."""
-    issues = []
     
     # Extract metric references from dashboard widgets
-    referenced_metrics = set()
     tiles = dashboard_config.get('mosaicLayout', {}).get('tiles', [])
-    
-    for tile in tiles:
-        widget = tile.get('widget', {})
-        
-        # Check XY chart datasets
-        xy_chart = widget.get('xyChart', {})
-        data_sets = xy_chart.get('dataSets', [])
-        
-        for data_set in data_sets:
-            ts_query = data_set.get('timeSeriesQuery', {})
-            ts_filter = ts_query.get('timeSeriesFilter', {})
-            filter_str = ts_filter.get('filter', '')
-            
-            # Extract metric type from filter
-            if 'metric.type=' in filter_str:
-                metric_part = filter_str.split('metric.type=')[1].split(' ')[0].strip('"')
-                if metric_part.startswith('logging.googleapis.com/user/'):
-                    metric_name = metric_part.replace('logging.googleapis.com/user/', '')
-                    referenced_metrics.add(metric_name)
-        
-        # Check scorecard queries
-        scorecard = widget.get('scorecard', {})
-        ts_query = scorecard.get('timeSeriesQuery', {})
-        ts_filter = ts_query.get('timeSeriesFilter', {})
-        filter_str = ts_filter.get('filter', '')
-        
-        if 'metric.type=' in filter_str:
-            metric_part = filter_str.split('metric.type=')[1].split(' ')[0].strip('"')
-            if metric_part.startswith('logging.googleapis.com/user/'):
-                metric_name = metric_part.replace('logging.googleapis.com/user/', '')
-                referenced_metrics.add(metric_name)
+    # Charts often share a filter, so parse each distinct one only once
+    filters = {
+        filter_str
+        for tile in tiles
+        for filter_str in _iter_filters(tile.get('widget', {}))
+        if filter_str
+    }
+    referenced_metrics = {
+        metric_type.removeprefix(_USER_METRIC_PREFIX)
+        for filter_str in filters
+        for metric_type in _METRIC_RE.findall(filter_str)
+        if metric_type.startswith(_USER_METRIC_PREFIX)
+    }
     
     # Check against defined metrics
     defined_metrics = {metric['name'] for metric in metrics_config.get('metrics', [])}
     
-    for metric in referenced_metrics:
-        if metric not in defined_metrics:
-            issues.append(f"Dashboard references undefined metric: {metric}")
-    
-    return issues
+    return [
+        f"Dashboard references undefined metric: {metric}"
+        for metric in sorted(referenced_metrics - defined_metrics)
+    ]
 
 def main():
     """Main function to create the monitoring dashboard."""
     
-    if len(sys.argv) != 2:
-        print("Usage: python3 create-dashboard.py <project_id>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Create the DressUp AI monitoring dashboard')
+    parser.add_argument('project_id', help='GCP Project ID')
+    parser.add_argument('--dashboard-config', type=Path, default=SCRIPT_DIR / 'dashboard-config.json',
+                        help='Dashboard configuration JSON (default: dashboard-config.json next to this script)')
+    parser.add_argument('--metrics-config', type=Path, default=SCRIPT_DIR / 'log-metrics.yaml',
+                        help='Log metrics configuration YAML (default: log-metrics.yaml next to this script)')
+    
+    args = parser.parse_args()
     
-    project_id = sys.argv[1]
-    dashboard_config_path = 'dashboard-config.json'
-    metrics_config_path = 'log-metrics.yaml'
+    project_id = args.project_id
+    dashboard_config_path = args.dashboard_config.resolve()
+    metrics_config_path = args.metrics_config.resolve()
     
     print(f"📊 Creating advanced monitoring dashboard for DressUp AI")
     print(f"📍 Project: {project_id}")
@@ -145,7 +168,7 @@ def main():
     
     # Initialize the client
     try:
-        client = monitoring_dashboard_v1.DashboardsServiceClient()
+        client = get_dashboard_client()
         print("✅ Connected to Cloud Monitoring API")
     except Exception as e:
         print(f"❌ Failed to initialize Cloud Monitoring client: {e}")
@@ -159,46 +182,54 @@ def main():
         dashboard_id = dashboard.name.split('/')[-1]
         dashboard_url = f"https://console.cloud.google.com/monitoring/dashboards/custom/{dashboard_id}?project={project_id}"
         
-        print("✅ Dashboard created successfully!")
-        print()
-        print("📊 Dashboard Details:")
-        print(f"   Name: {dashboard_config['displayName']}")
-        print(f"   ID: {dashboard_id}")
-        print(f"   Resource Name: {dashboard.name}")
-        print()
-        print("🔗 View Dashboard:")
-        print(f"   {dashboard_url}")
-        print()
+        sys.stdout.write(
+            "✅ Dashboard created successfully!\n"
+            "\n"
+            "📊 Dashboard Details:\n"
+            f"   Name: {dashboard_config['displayName']}\n"
+            f"   ID: {dashboard_id}\n"
+            f"   Resource Name: {dashboard.name}\n"
+            "\n"
+            "🔗 View Dashboard:\n"
+            f"   {dashboard_url}\n"
+            "\n"
+        )
         
         # Count widgets by type
         tiles = dashboard_config.get('mosaicLayout', {}).get('tiles', [])
-        chart_count = sum(1 for tile in tiles if 'xyChart' in tile.get('widget', {}))
-        scorecard_count = sum(1 for tile in tiles if 'scorecard' in tile.get('widget', {}))
-        
-        print("📈 Dashboard Layout:")
-        print(f"   • {len(tiles)} total widgets")
-        print(f"   • {chart_count} time series charts")
-        print(f"   • {scorecard_count} scorecard widgets")
-        print()
+        widget_kinds = Counter(key for tile in tiles for key in tile.get('widget', {}))
+        chart_count = widget_kinds['xyChart']
+        scorecard_count = widget_kinds['scorecard']
         
-        print("🎯 Monitoring Coverage:")
-        print("   • Application Performance (latency, success rate)")
-        print("   • User Experience (feedback ratings, confidence scores)")
-        print("   • System Health (error rates, cleanup efficiency)")
-        print("   • Business Metrics (sessions, uploads, usage)")
-        print("   • External Dependencies (Vertex AI performance)")
-        print()
+        sys.stdout.write(
+            "📈 Dashboard Layout:\n"
+            f"   • {len(tiles)} total widgets\n"
+            f"   • {chart_count} time series charts\n"
+            f"   • {scorecard_count} scorecard widgets\n"
+            "\n"
+            "🎯 Monitoring Coverage:\n"
+            "   • Application Performance (latency, success rate)\n"
+            "   • User Experience (feedback ratings, confidence scores)\n"
+            "   • System Health (error rates, cleanup efficiency)\n"
+            "   • Business Metrics (sessions, uploads, usage)\n"
+            "   • External Dependencies (Vertex AI performance)\n"
+            "\n"
+        )
         
         if not metrics_config.get('metrics'):
-            print("⚠️  Note: Metrics need to be created first!")
-            print("   Run: ./setup-metrics.sh or python3 create-log-metrics.py")
+            sys.stdout.write(
+                "⚠️  Note: Metrics need to be created first!\n"
+                "   Run: ./setup-metrics.sh or python3 create-log-metrics.py\n"
+            )
         
-        print("🚀 Next Steps:")
-        print("   1. Create log-based metrics (if not done)")
-        print("   2. Deploy Cloud Functions with structured logging")
-        print("   3. Generate test traffic to populate metrics")
-        print("   4. Set up alerting policies")
-        print("   5. Configure notification channels")
+        sys.stdout.write(
+            "🚀 Next Steps:\n"
+            "   1. Create log-based metrics (if not done)\n"
+            "   2. Deploy Cloud Functions with structured logging\n"
+            "   3. Generate test traffic to populate metrics\n"
+            "   4. Set up alerting policies\n"
+            "   5. Configure notification channels\n"
+        )
         
     except Exception as e:
         print(f"❌ Failed to create dashboard: {e}")
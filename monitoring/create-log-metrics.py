@@ -6,18 +6,59 @@ Creates sophisticated log-based metrics with value extractors and label extracto
 
 import yaml
 import json
+from google.api_core.exceptions import AlreadyExists
 from google.cloud import logging_v2
 from google.cloud.logging_v2 import LogMetric
 from typing import Dict, Any, List
 import sys
+import argparse
+import functools
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def load_metrics_config(config_path: str) -> Dict[str, Any]:
-    """Load metrics configuration from YAML file."""
+from _config_cache import load_cached
+
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+
+# Map config string values to descriptor enum values
+_MetricKind = LogMetric.MetricDescriptor.MetricKind
+_ValueType = LogMetric.MetricDescriptor.ValueType
+
+_KIND_MAP = {
+    'GAUGE': _MetricKind.GAUGE,
+    'DELTA': _MetricKind.DELTA,
+    'CUMULATIVE': _MetricKind.CUMULATIVE
+}
+
+_VALUE_TYPE_MAP = {
+    'INT64': _ValueType.INT64,
+    'DOUBLE': _ValueType.DOUBLE,
+    'DISTRIBUTION': _ValueType.DISTRIBUTION
+}
+
+@functools.lru_cache(maxsize=1)
+def get_metrics_client() -> logging_v2.MetricsServiceV2Client:
+    """Get a shared Metrics client so one gRPC channel serves every worker thread."""
+    return logging_v2.MetricsServiceV2Client()
+
+def _parse_yaml(config_path: Path) -> Dict[str, Any]:
     with open(config_path, 'r') as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=_YamlLoader)
+
+def load_metrics_config(config_path: Path) -> Dict[str, Any]:
+    """Load metrics configuration from YAML file."""
+    return load_cached(config_path, _parse_yaml)
 
-def create_log_metric(client: logging_v2.MetricsServiceV2Client, project_id: str, metric_config: Dict[str, Any]) -> None:
-    """Create a single log-based metric."""
+def create_log_metric(client: logging_v2.MetricsServiceV2Client, project_name: str, metric_config: Dict[str, Any]) -> str:
+    """Create or update a single log-based metric under project_name ("projects/<id>").
+    
+    Returns 'created' or 'updated'; API errors propagate to the caller.
+    """
     
     # Build the metric object
     metric = LogMetric(
@@ -38,59 +79,38 @@ def create_log_metric(client: logging_v2.MetricsServiceV2Client, project_id: str
     if 'metricDescriptor' in metric_config:
         descriptor = metric_config['metricDescriptor']
         if 'metricKind' in descriptor:
-            # Map string values to enum values
-            kind_map = {
-                'GAUGE': LogMetric.MetricDescriptor.MetricKind.GAUGE,
-                'DELTA': LogMetric.MetricDescriptor.MetricKind.DELTA,
-                'CUMULATIVE': LogMetric.MetricDescriptor.MetricKind.CUMULATIVE
-            }
-            metric.metric_descriptor.metric_kind = kind_map.get(
+            metric.metric_descriptor.metric_kind = _KIND_MAP.get(
                 descriptor['metricKind'], 
-                LogMetric.MetricDescriptor.MetricKind.GAUGE
+                _MetricKind.GAUGE
             )
             
         if 'valueType' in descriptor:
-            # Map string values to enum values
-            type_map = {
-                'INT64': LogMetric.MetricDescriptor.ValueType.INT64,
-                'DOUBLE': LogMetric.MetricDescriptor.ValueType.DOUBLE,
-                'DISTRIBUTION': LogMetric.MetricDescriptor.ValueType.DISTRIBUTION
-            }
-            metric.metric_descriptor.value_type = type_map.get(
+            metric.metric_descriptor.value_type = _VALUE_TYPE_MAP.get(
                 descriptor['valueType'],
-                LogMetric.MetricDescriptor.ValueType.INT64
+                _ValueType.INT64
             )
     
-    # Create the metric
-    project_name = f"projects/{project_id}"
-    
+    # Create the metric, updating it in place if it already exists
     try:
-        result = client.create_log_metric(parent=project_name, metric=metric)
-        print(f"✅ Created metric: {metric_config['name']}")
-        return result
-    except Exception as e:
-        if "already exists" in str(e).lower():
-            print(f"⚠️  Metric already exists: {metric_config['name']}")
-            # Update the existing metric
-            try:
-                metric_name = f"{project_name}/metrics/{metric_config['name']}"
-                result = client.update_log_metric(metric_name=metric_name, metric=metric)
-                print(f"📝 Updated metric: {metric_config['name']}")
-                return result
-            except Exception as update_e:
-                print(f"❌ Failed to update metric {metric_config['name']}: {update_e}")
-        else:
-            print(f"❌ Failed to create metric {metric_config['name']}: {e}")
+        client.create_log_metric(parent=project_name, metric=metric)
+        return 'created'
+    except AlreadyExists:
+        metric_name = f"{project_name}/metrics/{metric_config['name']}"
+        client.update_log_metric(metric_name=metric_name, metric=metric)
+        return 'updated'
 
 def main():
     """Main function to create all log-based metrics."""
     
-    if len(sys.argv) != 2:
-        print("Usage: python3 create-log-metrics.py <project_id>")
-        sys.exit(1)
+    parser = argparse.ArgumentParser(description='Create log-based metrics for DressUp AI')
+    parser.add_argument('project_id', help='GCP Project ID')
+    parser.add_argument('--config', type=Path, default=SCRIPT_DIR / 'log-metrics.yaml',
+                        help='Log metrics configuration YAML (default: log-metrics.yaml next to this script)')
+    
+    args = parser.parse_args()
     
-    project_id = sys.argv[1]
-    config_path = 'log-metrics.yaml'
+    project_id = args.project_id
+    config_path = args.config.resolve()
     
     print(f"🔧 Setting up advanced log-based metrics for DressUp AI")
     print(f"📍 Project: {project_id}")
@@ -102,7 +122,7 @@ def main():
         config = load_metrics_config(config_path)
     except FileNotFoundError:
         print(f"❌ Configuration file not found: {config_path}")
-        print("Make sure you're running this script from the monitoring directory.")
+        print("Pass --config with the path to log-metrics.yaml.")
         sys.exit(1)
     except yaml.YAMLError as e:
         print(f"❌ Failed to parse YAML configuration: {e}")
@@ -110,7 +130,7 @@ def main():
     
     # Initialize the client
     try:
-        client = logging_v2.MetricsServiceV2Client()
+        client = get_metrics_client()
     except Exception as e:
         print(f"❌ Failed to initialize Google Cloud Logging client: {e}")
         print("Make sure you have the google-cloud-logging package installed:")
@@ -125,13 +145,28 @@ def main():
     print(f"📊 Creating {len(metrics_config)} log-based metrics...")
     print()
     
-    for metric_config in metrics_config:
-        try:
-            create_log_metric(client, project_id, metric_config)
-            successful_metrics += 1
-        except Exception as e:
-            print(f"❌ Failed to create metric {metric_config.get('name', 'unknown')}: {e}")
-            failed_metrics += 1
+    project_name = f"projects/{project_id}"
+    
+    # Metrics are independent, so issue the RPCs concurrently
+    with ThreadPoolExecutor(max_workers=min(16, len(metrics_config)) or 1) as executor:
+        futures = {
+            executor.submit(create_log_metric, client, project_name, metric_config): metric_config
+            for metric_config in metrics_config
+        }
+        
+        # Report from the main thread so output lines never interleave
+        for future in as_completed(futures):
+            metric_config = futures[future]
+            try:
+                status = future.result()
+                if status == 'updated':
+                    print(f"📝 Updated existing metric: {metric_config['name']}")
+                else:
+                    print(f"✅ Created metric: {metric_config['name']}")
+                successful_metrics += 1
+            except Exception as e:
+                print(f"❌ Failed to create metric {metric_config.get('name', 'unknown')}: {e}")
+                failed_metrics += 1
     
     print()
     print("📈 Summary:")
@@ -139,14 +174,17 @@ def main():
     if failed_metrics > 0:
         print(f"   ❌ Failed: {failed_metrics} metrics")
     
-    print()
-    print("🔗 View metrics in Cloud Console:")
-    print(f"   https://console.cloud.google.com/logs/metrics?project={project_id}")
-    
-    print()
-    print("📋 Created metrics for monitoring:")
-    for metric_config in metrics_config:
-        print(f"   • {metric_config['name']}: {metric_config['description']}")
+    sys.stdout.write(
+        "\n"
+        "🔗 View metrics in Cloud Console:\n"
+        f"   https://console.cloud.google.com/logs/metrics?project={project_id}\n"
+        "\n"
+        "📋 Created metrics for monitoring:\n"
+    )
+    sys.stdout.write("".join(
+        f"   • {metric_config['name']}: {metric_config['description']}\n"
+        for metric_config in metrics_config
+    ))
     
     if 'dashboardMetrics' in config:
         print()
@@ -157,13 +195,15 @@ def main():
             for metric in metrics:
                 print(f"     - {metric}")
     
-    print()
-    print("🚀 Next steps:")
-    print("   1. Deploy Cloud Functions with structured logging")
-    print("   2. Generate some test traffic to populate metrics")
-    print("   3. Create monitoring dashboard")
-    print("   4. Set up alerting policies")
-    print("   5. Configure budget alerts for Vertex AI")
+    sys.stdout.write(
+        "\n"
+        "🚀 Next steps:\n"
+        "   1. Deploy Cloud Functions with structured logging\n"
+        "   2. Generate some test traffic to populate metrics\n"
+        "   3. Create monitoring dashboard\n"
+        "   4. Set up alerting policies\n"
+        "   5. Configure budget alerts for Vertex AI\n"
+    )
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
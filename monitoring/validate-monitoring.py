@@ -4,67 +4,165 @@ DressUp AI - Monitoring Pipeline Validation
 Comprehensive validation of monitoring setup including logs, metrics, dashboard, and budgets
 """
 
+import os
 import sys
 import json
+import tempfile
+import re
 import time
-import yaml
+import threading
 import argparse
+import functools
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import Dict, List, Any, Optional
-from google.cloud import logging
-from google.cloud import monitoring_v3
-from google.cloud import billing_budgets_v1
-from google.cloud import monitoring_dashboard_v1
-import requests
+
+_USER_METRIC_PREFIX = 'logging.googleapis.com/user/'
+
+# Loop-invariant filter fragments, formatted once at import
+_USER_METRIC_DESCRIPTOR_FILTER = f'metric.type = starts_with("{_USER_METRIC_PREFIX}")'
+_USER_METRIC_REGEX_PREFIX = re.escape(_USER_METRIC_PREFIX)
+
+# User metric names are cached between runs for a few minutes
+_METRIC_CACHE_DIR = Path(os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'dressup'
+_METRIC_CACHE_TTL = 600  # seconds
+
+@functools.lru_cache(maxsize=1)
+def _load_orjson():
+    """Import the optional orjson on first use, keeping it off the --help path."""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
 
 class MonitoringValidator:
     """Validates the complete monitoring pipeline for DressUp AI."""
     
-    def __init__(self, project_id: str):
+    def __init__(self, project_id: str, use_cache: bool = True):
         self.project_id = project_id
         self.project_name = f"projects/{project_id}"
+        self.use_cache = use_cache
         
-        # Initialize clients
-        self.logging_client = logging.Client(project=project_id)
-        self.monitoring_client = monitoring_v3.MetricServiceClient()
-        self.dashboard_client = monitoring_dashboard_v1.DashboardsServiceClient()
-        
-        # Test results
-        self.results = {
-            'structured_logging': {'passed': 0, 'failed': 0, 'tests': []},
-            'log_metrics': {'passed': 0, 'failed': 0, 'tests': []},
-            'dashboard': {'passed': 0, 'failed': 0, 'tests': []},
-            'budgets': {'passed': 0, 'failed': 0, 'tests': []},
-            'overall': {'passed': 0, 'failed': 0}
-        }
+        # Suites run concurrently; the lock guards results and console output
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        
+        # Test results, counted per (category, 'passed'/'failed')
+        self._counts = Counter()
+        self._tests = defaultdict(list)
+    
+    # Clients and their libraries are loaded on first use, so suites that
+    # never run don't pay for the gRPC/protobuf imports
+    @functools.cached_property
+    def logging_client(self):
+        from google.cloud import logging
+        return logging.Client(project=self.project_id)
+    
+    @functools.cached_property
+    def monitoring_client(self):
+        from google.cloud import monitoring_v3
+        return monitoring_v3.MetricServiceClient()
+    
+    @functools.cached_property
+    def dashboard_client(self):
+        from google.cloud import monitoring_dashboard_v1
+        return monitoring_dashboard_v1.DashboardsServiceClient()
+    
+    def _list_user_metrics(self) -> set:
+        """List user-defined log metric names, reusing a recent on-disk copy."""
+        cache_path = _METRIC_CACHE_DIR / f"metric-descriptors-{self.project_id}.json"
+        
+        orjson = _load_orjson()
+        
+        if self.use_cache:
+            try:
+                if time.time() - cache_path.stat().st_mtime < _METRIC_CACHE_TTL:
+                    data = cache_path.read_bytes()
+                    return set(orjson.loads(data) if orjson is not None else json.loads(data))
+            except (OSError, ValueError):
+                pass  # Missing, stale or corrupt cache, fetch from the API instead
+        
+        # Let the API return only user-defined log metrics
+        metrics = self.monitoring_client.list_metric_descriptors(request={
+            "name": self.project_name,
+            "filter": _USER_METRIC_DESCRIPTOR_FILTER,
+        })
+        user_metrics = sorted(
+            metric.type.removeprefix(_USER_METRIC_PREFIX)
+            for metric in metrics
+        )
+        
+        if self.use_cache:
+            data = orjson.dumps(user_metrics) if orjson is not None else json.dumps(user_metrics).encode()
+            try:
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+                with tempfile.NamedTemporaryFile(dir=cache_path.parent, delete=False) as f:
+                    f.write(data)
+                os.replace(f.name, cache_path)
+            except OSError:
+                pass  # Caching is best effort
+        
+        return set(user_metrics)
+    
+    def _print(self, message: str = "") -> None:
+        """Print a line, buffering it when called from a concurrently running suite."""
+        buffer = getattr(self._local, 'buffer', None)
+        if buffer is None:
+            print(message)
+        else:
+            buffer.append(message)
+    
+    def flush_output(self) -> None:
+        """Write the calling suite's buffered output with a single write."""
+        lines, self._local.buffer = self._local.buffer, []
+        if lines:
+            with self._lock:
+                sys.stdout.write('\n'.join(lines) + '\n')
+    
+    def _run_suite(self, suite) -> None:
+        """Run a test suite and print its output as one uninterrupted block."""
+        self._local.buffer = []
+        try:
+            suite()
+        finally:
+            self.flush_output()
+            self._local.buffer = None
     
     def log_test_result(self, category: str, test_name: str, passed: bool, details: str = ""):
         """Log a test result."""
-        self.results[category]['tests'].append({
-            'name': test_name,
-            'passed': passed,
-            'details': details
-        })
+        status = 'passed' if passed else 'failed'
+        with self._lock:
+            self._tests[category].append({
+                'name': test_name,
+                'passed': passed,
+                'details': details
+            })
+            self._counts[(category, status)] += 1
+            if category != 'overall':
+                self._counts[('overall', status)] += 1
         
         if passed:
-            self.results[category]['passed'] += 1
-            self.results['overall']['passed'] += 1
-            print(f"✅ {test_name}")
+            self._print(f"✅ {test_name}")
         else:
-            self.results[category]['failed'] += 1
-            self.results['overall']['failed'] += 1
-            print(f"❌ {test_name}")
+            self._print(f"❌ {test_name}")
             if details:
-                print(f"   Details: {details}")
+                self._print(f"   Details: {details}")
     
     def test_structured_logging(self) -> None:
         """Test structured logging functionality."""
-        print("\n🔍 Testing Structured Logging...")
+        self._print("\n🔍 Testing Structured Logging...")
         
         # Test 1: Check for structured logs from Cloud Functions
         try:
+            # Bound the query in time so the backend doesn't scan all retained logs
+            since = (datetime.now(timezone.utc) - timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
             filter_str = (
                 'resource.type="cloud_function" AND '
-                'jsonPayload.structuredData.eventType:*'
+                'jsonPayload.structuredData.eventType:* AND '
+                f'timestamp>="{since}"'
             )
             
             entries = list(self.logging_client.list_entries(
@@ -118,7 +216,7 @@ class MonitoringValidator:
                     'structured_logging',
                     'Structured logs present',
                     False,
-                    "No structured logs found. Deploy Cloud Functions first."
+                    "No structured logs found in the last hour. Deploy Cloud Functions first."
                 )
         
         except Exception as e:
@@ -131,15 +229,21 @@ class MonitoringValidator:
     
     def test_log_metrics(self) -> None:
         """Test log-based metrics creation and functionality."""
-        print("\n📊 Testing Log-Based Metrics...")
+        self._print("\n📊 Testing Log-Based Metrics...")
         
         # Load expected metrics from config
         try:
+            import yaml
+            try:
+                from yaml import CSafeLoader as YamlLoader
+            except ImportError:
+                from yaml import SafeLoader as YamlLoader
+            
             with open('log-metrics.yaml', 'r') as f:
-                metrics_config = yaml.safe_load(f)
+                metrics_config = yaml.load(f, Loader=YamlLoader)
             expected_metrics = [metric['name'] for metric in metrics_config.get('metrics', [])]
         except FileNotFoundError:
-            print("⚠️  log-metrics.yaml not found, using default metric list")
+            self._print("⚠️  log-metrics.yaml not found, using default metric list")
             expected_metrics = [
                 'session_creation_rate', 'generation_requests_total',
                 'generation_success_rate', 'generation_latency_ms',
@@ -147,14 +251,11 @@ class MonitoringValidator:
             ]
         
         # Test 1: Check if metrics exist
+        found_metrics = []
         try:
-            metrics = self.monitoring_client.list_metric_descriptors(name=self.project_name)
-            user_metrics = [
-                metric.type.replace('logging.googleapis.com/user/', '')
-                for metric in metrics
-                if metric.type.startswith('logging.googleapis.com/user/')
-            ]
+            user_metrics = self._list_user_metrics()
             
+            # Keep the config order for reporting
             found_metrics = [metric for metric in expected_metrics if metric in user_metrics]
             missing_metrics = [metric for metric in expected_metrics if metric not in user_metrics]
             
@@ -166,9 +267,9 @@ class MonitoringValidator:
             )
             
             if missing_metrics:
-                print(f"   Missing metrics: {', '.join(missing_metrics[:5])}")
+                self._print(f"   Missing metrics: {', '.join(missing_metrics[:5])}")
                 if len(missing_metrics) > 5:
-                    print(f"   ... and {len(missing_metrics) - 5} more")
+                    self._print(f"   ... and {len(missing_metrics) - 5} more")
         
         except Exception as e:
             self.log_test_result(
@@ -181,28 +282,38 @@ class MonitoringValidator:
         # Test 2: Check for metric data
         if found_metrics:
             try:
-                # Test one of the core metrics for data
-                test_metric = f"logging.googleapis.com/user/{found_metrics[0]}"
+                from google.cloud import monitoring_v3
                 
+                # Query every found metric at once instead of one RPC per metric
+                metric_pattern = '|'.join(re.escape(metric) for metric in found_metrics)
+                metric_filter = f'metric.type = monitoring.regex.full_match("{_USER_METRIC_REGEX_PREFIX}({metric_pattern})")'
+                
+                now = int(time.time())
                 interval = monitoring_v3.TimeInterval({
-                    "end_time": {"seconds": int(time.time())},
-                    "start_time": {"seconds": int(time.time() - 3600)},  # Last hour
+                    "end_time": {"seconds": now},
+                    "start_time": {"seconds": now - 3600},  # Last hour
                 })
                 
                 results = self.monitoring_client.list_time_series(
                     request={
                         "name": self.project_name,
-                        "filter": f'metric.type="{test_metric}"',
+                        "filter": metric_filter,
                         "interval": interval,
+                        # Series headers are enough to tell which metrics have data
+                        "view": monitoring_v3.ListTimeSeriesRequest.TimeSeriesView.HEADERS,
                     }
                 )
                 
-                time_series = list(results)
+                metrics_with_data = set()
+                for series in results:
+                    metrics_with_data.add(series.metric.type.removeprefix(_USER_METRIC_PREFIX))
+                    if len(metrics_with_data) == len(found_metrics):
+                        break  # Every metric has data, skip the remaining pages
                 self.log_test_result(
                     'log_metrics',
                     'Metric data availability',
-                    len(time_series) > 0,
-                    f"Found {len(time_series)} time series for {found_metrics[0]}"
+                    len(metrics_with_data) > 0,
+                    f"{len(metrics_with_data)}/{len(found_metrics)} metrics have data in the last hour"
                 )
                 
             except Exception as e:
@@ -215,7 +326,7 @@ class MonitoringValidator:
     
     def test_dashboard(self) -> None:
         """Test dashboard creation and configuration."""
-        print("\n📈 Testing Monitoring Dashboard...")
+        self._print("\n📈 Testing Monitoring Dashboard...")
         
         # Test 1: Check if dashboard exists
         try:
@@ -238,14 +349,33 @@ class MonitoringValidator:
                 
                 # Check for required widgets
                 if dashboard.mosaic_layout:
-                    tiles = dashboard.mosaic_layout.tiles
+                    # Copy out of the protobuf container once before walking it
+                    tiles = list(dashboard.mosaic_layout.tiles)
                     widget_types = []
+                    metric_references = []
                     
+                    # Collect widget types and metric references in one pass
                     for tile in tiles:
-                        if tile.widget.xy_chart:
+                        widget = tile.widget
+                        
+                        # Check XY charts
+                        xy_chart = widget.xy_chart
+                        if xy_chart:
                             widget_types.append('xy_chart')
-                        if tile.widget.scorecard:
+                            for dataset in xy_chart.data_sets:
+                                ts_query = dataset.time_series_query
+                                filter_str = ts_query.time_series_filter.filter
+                                if _USER_METRIC_PREFIX in filter_str:
+                                    metric_references.append(filter_str)
+                        
+                        # Check scorecards
+                        scorecard = widget.scorecard
+                        if scorecard:
                             widget_types.append('scorecard')
+                            ts_query = scorecard.time_series_query
+                            filter_str = ts_query.time_series_filter.filter
+                            if _USER_METRIC_PREFIX in filter_str:
+                                metric_references.append(filter_str)
                     
                     self.log_test_result(
                         'dashboard',
@@ -255,23 +385,6 @@ class MonitoringValidator:
                     )
                     
                     # Test 3: Check for key metrics in dashboard
-                    metric_references = []
-                    for tile in tiles:
-                        widget = tile.widget
-                        
-                        # Check XY charts
-                        if widget.xy_chart:
-                            for dataset in widget.xy_chart.data_sets:
-                                filter_str = dataset.time_series_query.time_series_filter.filter
-                                if 'logging.googleapis.com/user/' in filter_str:
-                                    metric_references.append(filter_str)
-                        
-                        # Check scorecards
-                        if widget.scorecard:
-                            filter_str = widget.scorecard.time_series_query.time_series_filter.filter
-                            if 'logging.googleapis.com/user/' in filter_str:
-                                metric_references.append(filter_str)
-                    
                     self.log_test_result(
                         'dashboard',
                         'Dashboard metric references',
@@ -296,15 +409,16 @@ class MonitoringValidator:
     
     def test_budget_alerts(self) -> None:
         """Test budget alerts configuration."""
-        print("\n💰 Testing Budget Alerts...")
+        self._print("\n💰 Testing Budget Alerts...")
         
         try:
             from google.cloud import billing
+            from google.cloud import billing_budgets_v1
             
             # Get billing account
             billing_client = billing.CloudBillingClient()
             project_billing = billing_client.get_project_billing_info(
-                name=f"projects/{self.project_id}"
+                name=self.project_name
             )
             
             if not project_billing.billing_enabled:
@@ -328,11 +442,14 @@ class MonitoringValidator:
                 budgets_client = billing_budgets_v1.BudgetServiceClient()
                 billing_account = project_billing.billing_account_name
                 
-                budgets = budgets_client.list_budgets(parent=billing_account)
-                budget_list = list(budgets)
+                # Stream large pages and keep only the DressUp AI budgets
+                budgets = budgets_client.list_budgets(request={
+                    "parent": billing_account,
+                    "page_size": 100,
+                })
                 
                 dressup_budgets = [
-                    budget for budget in budget_list
+                    budget for budget in budgets
                     if 'DressUp AI' in budget.display_name
                 ]
                 
@@ -371,7 +488,7 @@ class MonitoringValidator:
     
     def test_end_to_end_flow(self) -> None:
         """Test end-to-end monitoring flow if possible."""
-        print("\n🔄 Testing End-to-End Monitoring Flow...")
+        self._print("\n🔄 Testing End-to-End Monitoring Flow...")
         
         # This would require actual application traffic
         # For now, we'll just validate the pipeline structure
@@ -383,10 +500,11 @@ class MonitoringValidator:
             ('Budget Alerts', 'budgets')
         ]
         
-        working_components = []
-        for component_name, category in pipeline_components:
-            if self.results[category]['passed'] > 0:
-                working_components.append(component_name)
+        working_components = [
+            component_name
+            for component_name, category in pipeline_components
+            if self._counts[(category, 'passed')] > 0
+        ]
         
         self.log_test_result(
             'overall',
@@ -398,8 +516,10 @@ class MonitoringValidator:
     def generate_validation_report(self) -> Dict[str, Any]:
         """Generate a comprehensive validation report."""
         
-        total_tests = self.results['overall']['passed'] + self.results['overall']['failed']
-        success_rate = (self.results['overall']['passed'] / total_tests * 100) if total_tests > 0 else 0
+        passed_tests = self._counts[('overall', 'passed')]
+        failed_tests = self._counts[('overall', 'failed')]
+        total_tests = passed_tests + failed_tests
+        success_rate = (passed_tests / total_tests * 100) if total_tests > 0 else 0
         
         report = {
             'project_id': self.project_id,
@@ -407,21 +527,23 @@ class MonitoringValidator:
             'overall_status': 'PASS' if success_rate >= 75 else 'FAIL',
             'success_rate': f"{success_rate:.1f}%",
             'total_tests': total_tests,
-            'passed_tests': self.results['overall']['passed'],
-            'failed_tests': self.results['overall']['failed'],
+            'passed_tests': passed_tests,
+            'failed_tests': failed_tests,
             'categories': {}
         }
         
         for category in ['structured_logging', 'log_metrics', 'dashboard', 'budgets']:
-            category_total = self.results[category]['passed'] + self.results[category]['failed']
-            category_success = (self.results[category]['passed'] / category_total * 100) if category_total > 0 else 0
+            category_passed = self._counts[(category, 'passed')]
+            category_failed = self._counts[(category, 'failed')]
+            category_total = category_passed + category_failed
+            category_success = (category_passed / category_total * 100) if category_total > 0 else 0
             
             report['categories'][category] = {
                 'status': 'PASS' if category_success >= 75 else 'FAIL',
                 'success_rate': f"{category_success:.1f}%",
-                'passed': self.results[category]['passed'],
-                'failed': self.results[category]['failed'],
-                'tests': self.results[category]['tests']
+                'passed': category_passed,
+                'failed': category_failed,
+                'tests': self._tests[category]
             }
         
         return report
@@ -432,12 +554,20 @@ class MonitoringValidator:
         print(f"📍 Project: {self.project_id}")
         print("=" * 60)
         
-        # Run all test suites
-        self.test_structured_logging()
-        self.test_log_metrics()
-        self.test_dashboard()
-        self.test_budget_alerts()
-        self.test_end_to_end_flow()
+        # Run the independent test suites concurrently
+        suites = [
+            self.test_structured_logging,
+            self.test_log_metrics,
+            self.test_dashboard,
+            self.test_budget_alerts
+        ]
+        with ThreadPoolExecutor(max_workers=len(suites)) as executor:
+            futures = [executor.submit(self._run_suite, suite) for suite in suites]
+            for future in futures:
+                future.result()
+        
+        # End-to-end flow reads the aggregated results of the suites above
+        self._run_suite(self.test_end_to_end_flow)
         
         # Generate report
         report = self.generate_validation_report()
@@ -472,17 +602,24 @@ def main():
     parser.add_argument('project_id', help='GCP Project ID')
     parser.add_argument('--report-file', help='Save validation report to file')
     parser.add_argument('--verbose', '-v', action='store_true', help='Verbose output')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always fetch metric descriptors instead of using the 10 minute cache')
     
     args = parser.parse_args()
     
     try:
-        validator = MonitoringValidator(args.project_id)
+        validator = MonitoringValidator(args.project_id, use_cache=not args.no_cache)
         report = validator.run_validation()
         
         # Save report if requested
         if args.report_file:
-            with open(args.report_file, 'w') as f:
-                json.dump(report, f, indent=2)
+            orjson = _load_orjson()
+            if orjson is not None:
+                with open(args.report_file, 'wb') as f:
+                    f.write(orjson.dumps(report, option=orjson.OPT_INDENT_2))
+            else:
+                with open(args.report_file, 'w') as f:
+                    json.dump(report, f, indent=2)
             print(f"\n📄 Validation report saved to: {args.report_file}")
         
         # Exit with appropriate code